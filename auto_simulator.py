@@ -1,17 +1,71 @@
+import bisect
+
 from geopy.distance import geodesic
 
+# Adaptivni korak (u metrima): bez nesreća u okolini maksimalni korak, u gustim zonama minimalni
+# (fiksni korak animate_drive je 100 m - gradske zone se uzorkuju gušće, prazni putevi ređe)
+ADAPTIVE_MIN_STEP_M = 50.0
+ADAPTIVE_MAX_STEP_M = 1000.0
+# Gustina = broj nesreća u krugu od 1 km; svakih ADAPTIVE_DENSITY_SCALE nesreća korak se smanjuje
+ADAPTIVE_DENSITY_RADIUS_KM = 1.0
+ADAPTIVE_DENSITY_SCALE = 5.0
+
+
+# Dužine segmenata rute u metrima - računaju se jednom po ruti
+def route_segment_lengths(route_coords):
+    return [geodesic(route_coords[i], route_coords[i + 1]).meters for i in range(len(route_coords) - 1)]
+
+
+def cumulative_lengths(segment_lengths):
+    cumulative = [0.0]
+    for length in segment_lengths:
+        cumulative.append(cumulative[-1] + length)
+    return cumulative
+
+
+# Razmak do sledećeg koraka na osnovu broja nesreća u krugu od ADAPTIVE_DENSITY_RADIUS_KM
+def adaptive_step_meters(accident_count, min_step_m=ADAPTIVE_MIN_STEP_M, max_step_m=ADAPTIVE_MAX_STEP_M):
+    return max(min_step_m, max_step_m / (1 + accident_count / ADAPTIVE_DENSITY_SCALE))
+
+
+# Gustina se čita iz rezultata check_accident_zone za tačku u kojoj je automobil ocenjen
+# ('details' već sadrži distancu svake nesreće), bez dodatnog prostornog upita
+def nearby_accident_count(danger_result, radius_km=ADAPTIVE_DENSITY_RADIUS_KM):
+    if danger_result is None:
+        return None
+    return sum(1 for d in danger_result['details'] if d['distance'] <= radius_km)
+
+
+# Korak za poslednji rezultat ocene; pre prve ocene se kreće najmanjim korakom
+def _step_for_result(danger_result):
+    accident_count = nearby_accident_count(danger_result)
+    if accident_count is None:
+        return ADAPTIVE_MIN_STEP_M
+    return adaptive_step_meters(accident_count)
+
+
+# Vraća (indeks segmenta, progres 0.0-1.0) za pređenu distancu duž rute
+def _locate_on_route(cumulative, distance):
+    i = min(bisect.bisect_right(cumulative, distance) - 1, len(cumulative) - 2)
+    segment_length = cumulative[i + 1] - cumulative[i]
+    progress = (distance - cumulative[i]) / segment_length if segment_length > 0 else 0.0
+    return i, progress
+
 
 class AutoSimulator:
 
     #    route_coords: lista (lat, lon) koordinata rute
     #    speed_kmh: brzina automobila u km/h
     #    interval: interval u sekundama između pomeraja
-    def __init__(self, route_coords, speed_kmh=60, interval=1.0):
+    #    recorder: opcioni DriveTraceRecorder koji beleži promene brzine
+    #    adaptive: korak po gustini nesreća iz poslednjeg rezultata ocene (move(danger_result=...))
+    def __init__(self, route_coords, speed_kmh=60, interval=1.0, recorder=None, adaptive=False):
 
         self.route_coords = route_coords
         self.speed_kmh = speed_kmh
         self.interval = interval
         self.running = False
+        self.recorder = recorder
 
         # Trenutna pozicija između dva čvora
         self.current_segment = 0  # Indeks trenutnog segmenta
@@ -20,6 +74,16 @@ class AutoSimulator:
         # Izračunaj koliko metara se pomera po svakom koraku
         self.distance_per_step = (self.speed_kmh * 1000 / 3600) * self.interval  # u metrima
 
+        # Dužine segmenata se računaju jednom, ne pri svakom pomeraju
+        self.segment_lengths = route_segment_lengths(route_coords)
+        self.cumulative_lengths = cumulative_lengths(self.segment_lengths)
+
+        # Adaptivni mod - korak zavisi od gustine nesreća, vreme koraka od brzine
+        self.adaptive = adaptive
+        self.distance_travelled = 0.0
+        # Simulirano vreme poslednjeg koraka (u adaptivnom modu više intervala odjednom)
+        self.last_step_seconds = self.interval
+
     # Vraća trenutnu poziciju automobila (lat, lon)
     def get_current_position(self):
 
@@ -40,18 +104,18 @@ class AutoSimulator:
         return self.current_segment
 
     # Pomera automobil za jedan korak duž rute"""
-    def move(self, debug_print=False):
+    #   danger_result: rezultat check_accident_zone za trenutnu poziciju (koristi se samo u adaptivnom modu)
+    def move(self, debug_print=False, danger_result=None):
 
         if self.current_segment >= len(self.route_coords) - 1:
             self.running = False
             return self.get_current_position()
 
-        # Trenutni segment
-        start = self.route_coords[self.current_segment]
-        end = self.route_coords[self.current_segment + 1]
+        if self.adaptive:
+            return self._move_adaptive(danger_result, debug_print)
 
         # Dužina trenutnog segmenta u metrima
-        segment_length = geodesic(start, end).meters
+        segment_length = self.segment_lengths[self.current_segment]
 
         if segment_length == 0:
             # Ako su dva čvora na istom mestu, pređi na sledeći
@@ -79,9 +143,7 @@ class AutoSimulator:
 
             # Ponovo izračunaj za novi segment
             if self.current_segment < len(self.route_coords) - 1:
-                start = self.route_coords[self.current_segment]
-                end = self.route_coords[self.current_segment + 1]
-                segment_length = geodesic(start, end).meters
+                segment_length = self.segment_lengths[self.current_segment]
 
                 if segment_length > 0:
                     progress_increment = segment_length / self.distance_per_step
@@ -91,12 +153,37 @@ class AutoSimulator:
 
         return self.get_current_position()
 
+    # Pomera automobil za adaptivni korak - može preći i više kratkih segmenata odjednom
+    # Korak je celobrojni broj intervala (distance_per_step), pa promena brzine menja i pređeni put
+    def _move_adaptive(self, danger_result, debug_print=False):
+
+        intervals = max(1, int(_step_for_result(danger_result) // self.distance_per_step))
+        step = intervals * self.distance_per_step
+
+        self.last_step_seconds = intervals * self.interval
+        self.distance_travelled += step
+
+        if self.distance_travelled >= self.cumulative_lengths[-1]:
+            self.current_segment = len(self.route_coords) - 1
+            self.progress = 0.0
+        else:
+            self.current_segment, self.progress = _locate_on_route(self.cumulative_lengths, self.distance_travelled)
+
+        if debug_print:
+            print(
+                f"Trenutni segment: {self.current_segment}, Nesreće u okolini: {nearby_accident_count(danger_result)}, "
+                f"Korak: {step:.1f} m, Vreme koraka: {self.last_step_seconds:.1f} s, Progres: {self.progress:.2f}")
+
+        return self.get_current_position()
+
     # Povećaj brzinu za 10 km/h"""
     def increase_speed(self):
 
         self.speed_kmh += 10
         self.distance_per_step = (self.speed_kmh * 1000 / 3600) * self.interval
         print(f"Brzina povećana: {self.speed_kmh} km/h")
+        if self.recorder is not None:
+            self.recorder.record_speed_change('+')
 
     # Smanji brzinu za 10 km/h"""
     def decrease_speed(self):
@@ -105,6 +192,8 @@ class AutoSimulator:
             self.speed_kmh -= 10
             self.distance_per_step = (self.speed_kmh * 1000 / 3600) * self.interval
             print(f"Brzina smanjena: {self.speed_kmh} km/h")
+            if self.recorder is not None:
+                self.recorder.record_speed_change('-')
 
     # Proveri da li je automobil stigao na kraj
     def is_finished(self):
@@ -122,4 +211,63 @@ class AutoSimulator:
             'segment_progress': self.progress * 100,
             'overall_progress': overall_progress,
             'speed_kmh': self.speed_kmh
-        }
\ No newline at end of file
+        }
+
+
+# Generiše pozicije automobila duž rute za animate_drive (10 koraka po kilometru segmenta)
+# Sa adaptive=True korak se bira po gustini nesreća (vidi _iter_adaptive_route_positions)
+# Vraća (lat, lon, auto_progress_info) za svaki korak; rezultat ocene se vraća generatoru preko send()
+def iter_route_positions(route_coords, speed_kmh=50, adaptive=False):
+    if adaptive:
+        yield from _iter_adaptive_route_positions(route_coords, speed_kmh)
+        return
+
+    total_segments = len(route_coords) - 1
+    for i in range(total_segments):
+        start = route_coords[i]
+        end = route_coords[i + 1]
+
+        segment_distance = geodesic(start, end).km
+
+        steps = max(1, int(segment_distance * 10))
+        for s in range(steps):
+            lat = start[0] + (end[0] - start[0]) * (s / steps)
+            lon = start[1] + (end[1] - start[1]) * (s / steps)
+
+            auto_progress_info = {
+                'segment': i + 1,
+                'total_segments': total_segments,
+                'segment_progress': (s / steps) * 100,
+                'overall_progress': ((i + s / steps) / total_segments) * 100,
+                'speed_kmh': speed_kmh
+            }
+            yield lat, lon, auto_progress_info
+
+
+# Hoda duž rute po kumulativnoj distanci: retki delovi rute se preskaču krupnim koracima,
+# a gusti (gradske zone) se uzorkuju fino, nezavisno od dužine pojedinačnih segmenata.
+# Pozivalac šalje rezultat ocene svake pozicije preko send() - iz njega se bira sledeći korak.
+def _iter_adaptive_route_positions(route_coords, speed_kmh):
+    total_segments = len(route_coords) - 1
+    cumulative = cumulative_lengths(route_segment_lengths(route_coords))
+    total_length = cumulative[-1]
+
+    distance = 0.0
+    while distance < total_length:
+        i, progress = _locate_on_route(cumulative, distance)
+        start = route_coords[i]
+        end = route_coords[i + 1]
+
+        lat = start[0] + (end[0] - start[0]) * progress
+        lon = start[1] + (end[1] - start[1]) * progress
+
+        auto_progress_info = {
+            'segment': i + 1,
+            'total_segments': total_segments,
+            'segment_progress': progress * 100,
+            'overall_progress': (distance / total_length) * 100,
+            'speed_kmh': speed_kmh
+        }
+        danger_result = yield lat, lon, auto_progress_info
+
+        distance += _step_for_result(danger_result)
@@ -0,0 +1,99 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# LAKA KONZOLNA ULAZNA TAČKA
+    # Računa opasnost za jednu tačku bez učitavanja biblioteka za mapu i rutiranje (osmnx, networkx, matplotlib, contextily).
+    # Pokretanje:
+    #   python -m danger_score score --lat 44.8125 --lon 20.4612 --time "2024-05-01 08:00"
+    #   python -m danger_score bench-import
+    # bench-import meri vreme uvoza svakog modula preko python -X importtime.
+
+BENCH_MODULES = ['danger_score', 'kolokvijum1_spatial', 'auto_simulator', 'drive_trace', 'drive_simulator']
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$')
+
+
+def score(lat, lon, time_str=None, data_path=None, look_ahead_km=5.0):
+    from pandas import Timestamp
+    from kolokvijum1_spatial import check_accident_zone, load_accidents_data
+
+    if data_path:
+        load_accidents_data(data_path)
+    else:
+        load_accidents_data()
+
+    current_time = Timestamp(time_str) if time_str else Timestamp.now()
+    danger_result = check_accident_zone(
+        lat=lat,
+        lon=lon,
+        current_time=current_time,
+        look_ahead_km=look_ahead_km,
+        print_warning=False
+    )
+
+    print(
+        f"Pozicija: ({lat:.4f}, {lon:.4f}) | "
+        f"Vreme: {current_time.strftime('%Y-%m-%d %H:%M')} | "
+        f"Opasnost: {danger_result['danger_level']} | "
+        f"Ukupno: {danger_result['total']}, "
+        f"Vremenski (+- 1h): {danger_result['time_matched']} | "
+        f"Sezonski (+- 1m): {danger_result['seasonal_matched']}"
+    )
+    return danger_result
+
+
+def measure_import_time(module_name):
+    # Kumulativno vreme uvoza modula u milisekundama (svež interpreter, -X importtime ispisuje na stderr)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise ImportError(proc.stderr.strip().splitlines()[-1])
+
+    for line in reversed(proc.stderr.splitlines()):
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(3) == module_name:
+            return int(match.group(2)) / 1000.0
+    raise ValueError(f"Nije pronađeno vreme uvoza za {module_name}")
+
+
+def bench_import(modules=None):
+    results = {}
+    for module_name in modules or BENCH_MODULES:
+        try:
+            results[module_name] = measure_import_time(module_name)
+            print(f"{module_name}: {results[module_name]:.1f} ms")
+        except (ImportError, ValueError) as e:
+            print(f"{module_name}: greška pri uvozu ({e})")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='danger_score')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = subparsers.add_parser('score', help='Opasnost za zadatu poziciju i vreme')
+    score_parser.add_argument('--lat', type=float, required=True)
+    score_parser.add_argument('--lon', type=float, required=True)
+    score_parser.add_argument('--time', default=None, help='YYYY-MM-DD HH:MM (podrazumevano: sada)')
+    score_parser.add_argument('--data', default=None, help='MUP fajl sa nesrećama')
+    score_parser.add_argument('--look-ahead-km', type=float, default=5.0)
+
+    bench_parser = subparsers.add_parser('bench-import', help='Vreme uvoza modula (-X importtime)')
+    bench_parser.add_argument('modules', nargs='*')
+
+    args = parser.parse_args(argv)
+    if args.command == 'score':
+        score(args.lat, args.lon, time_str=args.time, data_path=args.data, look_ahead_km=args.look_ahead_km)
+    else:
+        bench_import(args.modules)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,36 @@
-import osmnx as ox
-from geopy.distance import geodesic
-from geopy.geocoders import Nominatim
-import matplotlib.pyplot as plt
-import contextily as ctx
-import networkx as nx
-import matplotlib
-import platform
-if platform.system() == 'Darwin':
-    matplotlib.use('MacOSX')
-else:
-    matplotlib.use('TkAgg')
-
-import matplotlib.pyplot as plt
-import contextily as ctx
-
+from auto_simulator import AutoSimulator, iter_route_positions
 from kolokvijum1_spatial import check_accident_zone
 
+# Teške biblioteke (osmnx, networkx, geopy.geocoders, matplotlib, contextily) se uvoze tek kada su potrebne
+# za rutiranje ili prikaz, tako da skripte koje samo računaju opasnost ne plaćaju njihovo učitavanje.
+_plt = None
+
+
+def _pyplot():
+    global _plt
+    if _plt is None:
+        import platform
+        import matplotlib
+        if platform.system() == 'Darwin':
+            matplotlib.use('MacOSX')
+        else:
+            matplotlib.use('TkAgg')
+
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
+
+# osmnx sam uvozi matplotlib.pyplot, pa se backend bira pre njegovog prvog uvoza
+def _osmnx():
+    _pyplot()
+    import osmnx as ox
+    return ox
+
 
 def load_serbian_roads():
     # Učitaj mrežu puteva Srbije
+    ox = _osmnx()
 
     G = ox.load_graphml('serbia_roads.graphml')
     if G is None:
@@ -28,6 +40,8 @@ def load_serbian_roads():
 
 
 def get_route_coordinates(start_city, end_city):
+    from geopy.geocoders import Nominatim
+
     geolocator = Nominatim(user_agent="h3-project-advanced-db", timeout=10)
 
     start_loc = geolocator.geocode(start_city + ", Serbia")
@@ -78,6 +92,9 @@ def show_route_distances(route_coords):
 
 
 def get_route_coords(G, orig, dest):
+    ox = _osmnx()
+    import networkx as nx
+
     # Nađi najbliže čvorove u grafu
     orig_node = ox.distance.nearest_nodes(G, orig[1], orig[0])
     dest_node = ox.distance.nearest_nodes(G, dest[1], dest[0])
@@ -96,7 +113,9 @@ def get_route_coords(G, orig, dest):
 
 class DriveSimulator:
 
-    def __init__(self, G, drive_time, edge_color='lightgray', edge_linewidth=0.5):
+    #   recorder: opcioni DriveTraceRecorder, trace_path: gde se snimak čuva po završetku vožnje
+    def __init__(self, G, drive_time, edge_color='lightgray', edge_linewidth=0.5, recorder=None, trace_path=None):
+        ox = _osmnx()
         self.fig, self.ax = ox.plot_graph(G, node_size=0, edge_color=edge_color, edge_linewidth=edge_linewidth,
                                           show=False, close=False)
         self.fig.set_size_inches(10, 7)
@@ -104,6 +123,8 @@ class DriveSimulator:
         self.danger_text = None
         self.accident_info_text = None
         self.drive_time = drive_time
+        self.recorder = recorder
+        self.trace_path = trace_path
 
     def prikazi_mapu(self, route_coords, route_color, auto_marker_color='ro', auto_marker_size=8):
         # 5. Crtanje rute
@@ -123,11 +144,13 @@ class DriveSimulator:
 
         self.ax.legend()
 
+        plt = _pyplot()
         plt.ion()  # Interaktivni mod
         plt.show()
 
     def _show_background_map(self, ax):
         try:
+            import contextily as ctx
 
             ctx.add_basemap(ax, crs="EPSG:4326", source=ctx.providers.OpenStreetMap.Mapnik)
             # ctx.add_basemap(ax, crs="EPSG:4326", source=ctx.providers.CartoDB.Positron)
@@ -170,6 +193,9 @@ class DriveSimulator:
         time_matched = danger_result['time_matched']
         seasonal_matched = danger_result['seasonal_matched']
 
+        if self.recorder is not None:
+            self.recorder.record_tick(lat, lon, danger_result)
+
         # Ažuriraj poziciju auto markera na mapi
         self.marker.set_data([lon], [lat])
 
@@ -194,48 +220,83 @@ class DriveSimulator:
             f"Sezonski (+- 1m): {seasonal_matched} | "
         )
 
-        plt.pause(plot_pause)
+        _pyplot().pause(plot_pause)
         self.fig.canvas.draw()
         self.fig.canvas.flush_events()
+        return danger_result
 
     def finish_drive(self):
+        # Snimak se čuva pre blokirajućeg plt.show() i odvaja se od simulatora
+        if self.recorder is not None:
+            self.recorder.save(self.trace_path)
+            self.recorder = None
+
+        plt = _pyplot()
         plt.ioff()
         plt.title(f"Ruta završena!")
         plt.show()
 
-    def animate_drive(self, route_coords, speed_kmh=50, plot_pause=0.05):
-        total_segments = len(route_coords) - 1
-        for i in range(total_segments):
-            start = route_coords[i]
-            end = route_coords[i + 1]
-
-            segment_distance = geodesic(start, end).km
-
-            time_for_segment = (segment_distance / speed_kmh) * 3600
-
-            steps = max(1, int(segment_distance * 10))
-            for s in range(steps):
-                lat = start[0] + (end[0] - start[0]) * (s / steps)
-                lon = start[1] + (end[1] - start[1]) * (s / steps)
+    #   adaptive: korak po gustini nesreća umesto fiksnih 10 koraka po kilometru
+    def animate_drive(self, route_coords, speed_kmh=50, plot_pause=0.05, adaptive=False):
+        # Rezultat ocene se vraća generatoru - iz njega se bira sledeći adaptivni korak
+        positions = iter_route_positions(route_coords, speed_kmh=speed_kmh, adaptive=adaptive)
+        danger_result = None
+        while True:
+            try:
+                lat, lon, auto_progress_info = positions.send(danger_result)
+            except StopIteration:
+                break
+            danger_result = self.move_auto_marker(lat, lon, auto_progress_info, plot_pause=plot_pause)
+        print("\n=== Automobil je stigao na destinaciju! ===")
+        self.finish_drive()
+        return
 
-                auto_progress_info = {
-                    'segment': i + 1,
-                    'total_segments': total_segments,
-                    'segment_progress': (s / steps) * 100,
-                    'overall_progress': ((i + s / steps) / total_segments) * 100,
-                    'speed_kmh': speed_kmh
-                }
+    # Vožnja preko AutoSimulator-a: '+' i '-' na tastaturi menjaju brzinu tokom vožnje
+    def auto_drive(self, auto_simulator, plot_pause=0.05):
+        def on_key(event):
+            if event.key == '+':
+                auto_simulator.increase_speed()
+            elif event.key == '-':
+                auto_simulator.decrease_speed()
+
+        cid = self.fig.canvas.mpl_connect('key_press_event', on_key)
+        last_segment = len(auto_simulator.route_coords) - 1
+        danger_result = None
+        while auto_simulator.current_segment < last_segment:
+            lat, lon = auto_simulator.move(danger_result=danger_result)
+            # Pauza prati simulirano vreme koraka - adaptivni korak preko više intervala traje duže
+            step_pause = plot_pause * auto_simulator.last_step_seconds / auto_simulator.interval
+            danger_result = self.move_auto_marker(lat, lon, auto_simulator.get_progress_info(),
+                                                  plot_pause=step_pause)
+        self.fig.canvas.mpl_disconnect(cid)
 
-                self.move_auto_marker(lat, lon, auto_progress_info, plot_pause=plot_pause)
         print("\n=== Automobil je stigao na destinaciju! ===")
         self.finish_drive()
-        return
 
 if __name__ == '__main__':
+    import argparse
+    import os
     import sys
+
+    parser = argparse.ArgumentParser(prog='drive_simulator')
+    parser.add_argument('--record', metavar='TRACE', default=None, help='Sačuvaj vožnju u trace fajl (.json.gz)')
+    parser.add_argument('--auto', action='store_true', help='Vožnja preko AutoSimulator-a (+/- menja brzinu)')
+    parser.add_argument('--adaptive', action='store_true', help='Adaptivni korak po gustini nesreća')
+    parser.add_argument('--data', default=None, help='MUP fajl sa nesrećama')
+    args = parser.parse_args()
+
+    # Putanja snimka se proverava pre interaktivne vožnje, ne posle nje
+    if args.record is not None:
+        record_dir = os.path.dirname(os.path.abspath(args.record))
+        if not os.path.isdir(record_dir):
+            parser.error(f"direktorijum za --record ne postoji: {record_dir}")
+
     try:
         from kolokvijum1_spatial import load_accidents_data
-        load_accidents_data()
+        if args.data:
+            load_accidents_data(args.data)
+        else:
+            load_accidents_data()
     except Exception as e:
         print("Greška pri učitavanju podataka:", e)
         sys.exit(1)
@@ -257,12 +318,26 @@ if __name__ == '__main__':
 
     route_coords, route_nodes = get_route_coords(G, orig, dest)
 
-    simulator = DriveSimulator(G, drive_time)
+    speed_kmh = 50
+    auto_interval = 10.0  # sekundi simuliranog vremena po koraku AutoSimulator-a
+
+    recorder = None
+    if args.record is not None:
+        from drive_trace import DriveTraceRecorder, MODE_ANIMATE, MODE_AUTO
+        recorder = DriveTraceRecorder(route_coords, drive_time, mode=MODE_AUTO if args.auto else MODE_ANIMATE,
+                                      speed_kmh=speed_kmh, interval=auto_interval, adaptive=args.adaptive,
+                                      data_path=args.data, start_city=start_city, end_city=end_city)
+
+    simulator = DriveSimulator(G, drive_time, recorder=recorder, trace_path=args.record)
     simulator.prikazi_mapu(route_coords, route_color='blue')
-    simulator.animate_drive(route_coords, speed_kmh=50, plot_pause=0.05)
+    if args.auto:
+        auto_simulator = AutoSimulator(route_coords, speed_kmh=speed_kmh, interval=auto_interval, recorder=recorder,
+                                       adaptive=args.adaptive)
+        simulator.auto_drive(auto_simulator, plot_pause=0.05)
+    else:
+        simulator.animate_drive(route_coords, speed_kmh=speed_kmh, plot_pause=0.05, adaptive=args.adaptive)
 
     total_segments = len(route_coords)
-    speed_kmh = 50
 
     for i, (lat, lon) in enumerate(route_coords):
         overall_progress = (i + 1) / total_segments * 100
@@ -0,0 +1,216 @@
+import gzip
+import importlib
+import json
+import sys
+import time
+
+import pandas as pd
+
+from auto_simulator import AutoSimulator, iter_route_positions
+from kolokvijum1_spatial import check_accident_zone, load_accidents_data
+
+# SNIMANJE I REPRODUKCIJA VOŽNJE
+    # Trace fajl (gzip JSON) čuva rutu, vreme polaska, brzinu, promene brzine i rezultat opasnosti za svaki korak.
+    # Reprodukcija ne koristi input(), geokodiranje ni plt.pause - radi bez prozora, maksimalnom brzinom.
+    # Rezultati reprodukcije se porede sa snimljenim (ili između dve implementacije indeksa).
+    # Pokretanje:
+    #   python drive_simulator.py --record trace.json.gz
+    #   python drive_trace.py trace.json.gz [--compare modul:funkcija]
+    #   npr. --compare kolokvijum1_spatial:check_accident_zone_global (kompozitni vs globalni vremenski indeks)
+    #   --adaptive: ista ruta sa adaptivnim korakom - poredi broj poziva i redosled nivoa opasnosti sa snimkom
+
+TRACE_VERSION = 1
+MODE_ANIMATE = 'animate'
+MODE_AUTO = 'auto'
+TICK_FIELDS = ('total', 'time_matched', 'seasonal_matched', 'danger_level')
+
+
+class DriveTraceRecorder:
+
+    #    route_coords: lista (lat, lon) koordinata rute
+    #    drive_time: pd.Timestamp vremena polaska
+    #    mode: 'animate' (DriveSimulator.animate_drive) ili 'auto' (AutoSimulator.move)
+    #    adaptive: da li je korak biran po gustini nesreća (iz rezultata check_accident_zone)
+    def __init__(self, route_coords, drive_time, mode=MODE_ANIMATE, speed_kmh=50, interval=1.0,
+                 look_ahead_km=5.0, data_path=None, start_city=None, end_city=None, adaptive=False):
+        self.header = {
+            'version': TRACE_VERSION,
+            'mode': mode,
+            'start_city': start_city,
+            'end_city': end_city,
+            'drive_time': drive_time.isoformat(),
+            'speed_kmh': speed_kmh,
+            'interval': interval,
+            'adaptive': adaptive,
+            'look_ahead_km': look_ahead_km,
+            'data_path': data_path,
+        }
+        self.route_coords = [list(c) for c in route_coords]
+        self.speed_changes = []  # [indeks koraka, '+' ili '-']
+        self.ticks = []  # [lat, lon, total, time_matched, seasonal_matched, danger_level]
+
+    def record_speed_change(self, direction):
+        self.speed_changes.append([len(self.ticks), direction])
+
+    def record_tick(self, lat, lon, danger_result):
+        self.ticks.append([lat, lon] + [danger_result[f] for f in TICK_FIELDS])
+
+    def save(self, path):
+        trace = dict(self.header, route_coords=self.route_coords,
+                     speed_changes=self.speed_changes, ticks=self.ticks)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(trace, f, separators=(',', ':'))
+        print(f"Trace sačuvan: {path} ({len(self.ticks)} koraka)")
+
+
+def load_trace(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        trace = json.load(f)
+    if trace.get('version') != TRACE_VERSION:
+        raise ValueError(f"Nepodržana verzija trace fajla: {trace.get('version')}")
+    trace['route_coords'] = [tuple(c) for c in trace['route_coords']]
+    return trace
+
+
+def _iter_auto_positions(trace, adaptive=False):
+    # Ponavlja AutoSimulator vožnju primenjujući promene brzine na istim koracima kao u snimku
+    route_coords = trace['route_coords']
+    sim = AutoSimulator(route_coords, speed_kmh=trace['speed_kmh'], interval=trace['interval'],
+                        adaptive=adaptive)
+    changes = trace['speed_changes']
+    next_change = 0
+    tick = 0
+    danger_result = None
+    while sim.current_segment < len(route_coords) - 1:
+        while next_change < len(changes) and changes[next_change][0] == tick:
+            if changes[next_change][1] == '+':
+                sim.increase_speed()
+            else:
+                sim.decrease_speed()
+            next_change += 1
+        lat, lon = sim.move(danger_result=danger_result)
+        danger_result = yield lat, lon
+        tick += 1
+
+
+# Generator pozicija; rezultat ocene svake pozicije se vraća preko send() (adaptivni korak)
+def _iter_trace_positions(trace, adaptive):
+    if trace['mode'] == MODE_AUTO:
+        yield from _iter_auto_positions(trace, adaptive=adaptive)
+    else:
+        positions = iter_route_positions(trace['route_coords'], speed_kmh=trace['speed_kmh'], adaptive=adaptive)
+        danger_result = None
+        while True:
+            try:
+                lat, lon, _ = positions.send(danger_result)
+            except StopIteration:
+                return
+            danger_result = yield lat, lon
+
+
+#    adaptive: None - kao u snimku, True/False - nametne (ne)adaptivni korak
+def replay_trace(trace, scorer=check_accident_zone, adaptive=None):
+    # Reprodukuje vožnju bez prikaza i vraća rezultate svakog koraka u istom formatu kao snimak
+    if adaptive is None:
+        adaptive = trace.get('adaptive', False)
+    drive_time = pd.Timestamp(trace['drive_time'])
+    look_ahead_km = trace['look_ahead_km']
+
+    # Adaptivni korak se bira iz rezultata scorer-a - jedan prostorni upit po koraku
+    ticks = []
+    positions = _iter_trace_positions(trace, adaptive)
+    danger_result = None
+    start = time.perf_counter()
+    while True:
+        try:
+            lat, lon = positions.send(danger_result)
+        except StopIteration:
+            break
+        danger_result = scorer(lat=lat, lon=lon, current_time=drive_time,
+                               look_ahead_km=look_ahead_km, print_warning=False)
+        ticks.append([lat, lon] + [danger_result[f] for f in TICK_FIELDS])
+    elapsed = time.perf_counter() - start
+
+    return {'ticks': ticks, 'seconds': elapsed, 'scoring_calls': len(ticks)}
+
+
+def diff_ticks(expected, actual):
+    # Vraća listu (indeks, očekivano, dobijeno) za korake koji se razlikuju
+    diffs = []
+    for i in range(max(len(expected), len(actual))):
+        e = expected[i] if i < len(expected) else None
+        a = actual[i] if i < len(actual) else None
+        if e != a:
+            diffs.append((i, e, a))
+    return diffs
+
+
+def danger_level_sequence(ticks):
+    # Redosled nivoa opasnosti duž rute (uzastopna ponavljanja spojena) - mera vernosti upozorenja
+    levels = []
+    for tick in ticks:
+        if not levels or levels[-1] != tick[-1]:
+            levels.append(tick[-1])
+    return levels
+
+
+def _print_diffs(label, diffs, limit=10):
+    if not diffs:
+        print(f"{label}: nema razlika")
+        return
+    print(f"{label}: {len(diffs)} različitih koraka")
+    for i, e, a in diffs[:limit]:
+        print(f"  [{i}] očekivano: {e} | dobijeno: {a}")
+
+
+def _load_scorer(spec):
+    module_name, func_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='drive_trace')
+    parser.add_argument('trace', help='Trace fajl (.json.gz) snimljen preko drive_simulator.py --record')
+    parser.add_argument('--compare', metavar='SPEC', default=None,
+                        help='Druga implementacija za poređenje, modul:funkcija')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Reprodukuj i sa suprotnim (adaptivnim/fiksnim) korakom i uporedi')
+    args = parser.parse_args()
+
+    if args.compare is not None and ':' not in args.compare:
+        parser.error(f"--compare očekuje modul:funkcija, dobijeno {args.compare!r}")
+
+    trace = load_trace(args.trace)
+    print(f"Trace: {trace['start_city']} -> {trace['end_city']}, {trace['mode']}, "
+          f"{len(trace['ticks'])} koraka, vreme {trace['drive_time']}")
+
+    if trace['data_path']:
+        load_accidents_data(trace['data_path'])
+    else:
+        load_accidents_data()
+
+    result = replay_trace(trace)
+    print(f"Reprodukcija: {len(result['ticks'])} koraka za {result['seconds']:.3f} s")
+    diffs = diff_ticks(trace['ticks'], result['ticks'])
+    _print_diffs("Snimak vs check_accident_zone", diffs)
+
+    if args.compare is not None:
+        spec = args.compare
+        other = replay_trace(trace, scorer=_load_scorer(spec))
+        print(f"Reprodukcija ({spec}): {len(other['ticks'])} koraka za {other['seconds']:.3f} s")
+        other_diffs = diff_ticks(result['ticks'], other['ticks'])
+        _print_diffs(f"check_accident_zone vs {spec}", other_diffs)
+        diffs = diffs or other_diffs
+
+    if args.adaptive:
+        adaptive = replay_trace(trace, adaptive=not trace.get('adaptive', False))
+        print(f"Reprodukcija ({'adaptivni' if not trace.get('adaptive', False) else 'fiksni'} korak): "
+              f"{adaptive['seconds']:.3f} s (snimak: {result['seconds']:.3f} s)")
+        for label, r in (('snimak', result), ('reprodukcija', adaptive)):
+            print(f"  Pozivi check_accident_zone ({label}): {r['scoring_calls']}")
+        print(f"  Nivoi opasnosti (snimak): {' -> '.join(danger_level_sequence(result['ticks']))}")
+        print(f"  Nivoi opasnosti (reprodukcija): {' -> '.join(danger_level_sequence(adaptive['ticks']))}")
+
+    sys.exit(1 if diffs else 0)
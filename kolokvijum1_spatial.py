@@ -1,7 +1,9 @@
 import math
+import os
 import time
 from collections import defaultdict
 import bisect
+import numpy as np
 import pandas as pd
 from h3 import latlng_to_cell, grid_disk
 from geopy.distance import geodesic
@@ -12,6 +14,24 @@ SECONDS_IN_DAY = 86400
 SECONDS_IN_YEAR = 31536000
 SECONDS_IN_LEAP_YEAR = 31622400
 
+# MUP fajlovi nemaju zaglavlje - čitaju se samo kolone koje su potrebne (po poziciji)
+ACCIDENT_COLUMNS = {3: 'datetime_str', 4: 'lon_raw', 5: 'lat_raw'}
+DATETIME_FORMAT = '%d.%m.%Y,%H:%M'
+# Koordinate su u nekim fajlovima u stepenima (20.335314), a u 2024. kao cifre bez decimalne tačke,
+# najčešće mikrostepeni (20358773), ali i sa odsečenim nulama (2041225 = 20.41225) - pomešano u istom fajlu
+MAX_DEGREES = 180.0
+# Grube granice Srbije za proveru koordinata (lat_min, lat_max, lon_min, lon_max)
+SERBIA_BOUNDS = (41.8, 46.3, 18.8, 23.1)
+BENCH_READER_PARQUET = 'parquet'
+BENCH_READERS = ('openpyxl', 'calamine', BENCH_READER_PARQUET)
+DATA_FILES = [
+    "data/nez-opendata-2020-20210125.xlsx",
+    "data/nez-opendata-2021-20220125.xlsx",
+    "data/nez-opendata-2022-20230125.xlsx",
+    "data/nez-opendata-2024-20250125.xlsx",
+    "data/nez-opendata-202510-20251025.xlsx",
+]
+
 ACCIDENTS_DF = None
 ACCIDENTS_RECORDS = {}
 ACCIDENTS_H3_MAP = defaultdict(set)
@@ -22,6 +42,16 @@ time_of_day_ids = []
 day_of_year_keys = []
 day_of_year_ids = []
 
+# Kompozitni indeks (H3 ćelija x vreme): zapisi sortirani po (ćelija, ključ), CELL_OFFSETS[ćelija] = (početak, kraj)
+CELL_OFFSETS = {}
+cell_time_of_day_keys = []
+cell_time_of_day_ids = []
+cell_day_of_year_keys = []
+cell_day_of_year_ids = []
+
+TEMPORAL_INDEX_CELL = 'cell'
+TEMPORAL_INDEX_GLOBAL = 'global'
+
 # Pavle Pantić, SI94/24
 # VAŽNO -> Pokretati drive_simulator.py da bi se interagovalo sa konzolom i prikazala simulacija.
 # U konzolu treba uneti startni i ciljni grad - putanja se računa za njih dinamički iz graphml fajla. Potom ukucati vreme u YYYY-MM-DD HH:MM formatu (ili enter ukoliko je vreme sada).
@@ -43,9 +73,15 @@ day_of_year_ids = []
     # Na osnovu fajla, podaci su sortirani hronološki po timestampu i čuvaju se u array.
     # Preko bisect modula se radi binarna pretraga na nesrećama u specifičnim vremenskim okvirima, pa se tako nalaze podaci za mesec i sat.
     # Prosečna složenost je O(log n).
+    # Pored globalnih nizova, postoji i kompozitni indeks H3 ćelija x vreme: svaka ćelija ima svoj opseg u nizovima
+    # sortiranim po (ćelija, vreme dana) i (ćelija, sekunde u godini). Upit radi binarnu pretragu samo u dodirnutim ćelijama,
+    # pa je složenost O(m log k), gde je k broj nesreća u ćeliji - zavisi od lokalne gustine, ne od ukupnog broja zapisa.
 
 # PODACI O NESREĆAMA
-    # Korišćen MUP fajl iz 2024. sa Drive liste, otvoren preko Pandas biblioteke. Problem nedostatka zaglavlja rešen preimenovanjem kolona.
+    # Korišćen MUP fajl iz 2024. sa Drive liste, otvoren preko Pandas biblioteke. Problem nedostatka zaglavlja rešen čitanjem samo potrebnih kolona (header=None) i imenovanjem po poziciji.
+    # Excel se čita preko calamine engine-a (ako je instaliran) i jednom konvertuje u Parquet keš pored originalnog fajla.
+    # Benchmark učitavanja (openpyxl, calamine i Parquet, svaki u zasebnom procesu): python kolokvijum1_spatial.py --bench
+    # Benchmark vremenskog dela upita (kompozitni vs globalni indeks): python kolokvijum1_spatial.py --bench-index
     # Posmatra narednih 5.0km - promenljivo u kodu, arbitrarna vrednost.
     # Klasifikacija opasnosti je takođe arbitrarno izabrana, lako se menja u if-else bloku.
 
@@ -70,20 +106,15 @@ def _season_seconds(ts: pd.Timestamp) -> int:
 def _cells_for_km(look_ahead_km: float) -> int:
     return max(1, int(math.ceil(look_ahead_km / CELL_KM)))
 
-def _insert_sorted_pair(keys_list, ids_list, key, rec_id):
-    i = bisect.bisect_right(keys_list, key)
-    keys_list.insert(i, key)
-    ids_list.insert(i, rec_id)
-
 def _build_indexes_from_df(df: pd.DataFrame, resolution: int = RESOLUTION):
     global ACCIDENTS_RECORDS, ACCIDENTS_H3_MAP, time_of_day_keys, time_of_day_ids, day_of_year_keys, day_of_year_ids
+    global CELL_OFFSETS, cell_time_of_day_keys, cell_time_of_day_ids, cell_day_of_year_keys, cell_day_of_year_ids
 
     ACCIDENTS_RECORDS = {}
     ACCIDENTS_H3_MAP = defaultdict(set)
-    time_of_day_keys = []
-    time_of_day_ids = []
-    day_of_year_keys = []
-    day_of_year_ids = []
+
+    # (ćelija, vreme dana, sekunde u godini, id) - sortira se jednom na kraju umesto umetanja pri svakom zapisu
+    entries = []
 
     for idx, row in df.iterrows():
         dt = row['datetime']
@@ -97,27 +128,138 @@ def _build_indexes_from_df(df: pd.DataFrame, resolution: int = RESOLUTION):
         ACCIDENTS_RECORDS[rec_id] = rec
 
         cell = latlng_to_cell(lat, lon, resolution)
-
-        tod = _seconds_since_midnight(dt)
-        _insert_sorted_pair(time_of_day_keys, time_of_day_ids, tod, rec_id)
-
-        doy = _season_seconds(dt)
-        _insert_sorted_pair(day_of_year_keys, day_of_year_ids, doy, rec_id)
+        entries.append((cell, _seconds_since_midnight(dt), _season_seconds(dt), rec_id))
 
         ACCIDENTS_H3_MAP[cell].add(rec_id)
 
+    # Globalni nizovi (stabilno sortiranje čuva redosled umetanja za iste ključeve)
+    by_tod = sorted(entries, key=lambda e: e[1])
+    time_of_day_keys = [e[1] for e in by_tod]
+    time_of_day_ids = [e[3] for e in by_tod]
+
+    by_doy = sorted(entries, key=lambda e: e[2])
+    day_of_year_keys = [e[2] for e in by_doy]
+    day_of_year_ids = [e[3] for e in by_doy]
+
+    # Kompozitni indeks - opsezi ćelija su isti u oba niza jer je broj zapisa po ćeliji isti
+    by_cell_tod = sorted(entries, key=lambda e: (e[0], e[1]))
+    cell_time_of_day_keys = [e[1] for e in by_cell_tod]
+    cell_time_of_day_ids = [e[3] for e in by_cell_tod]
+
+    by_cell_doy = sorted(entries, key=lambda e: (e[0], e[2]))
+    cell_day_of_year_keys = [e[2] for e in by_cell_doy]
+    cell_day_of_year_ids = [e[3] for e in by_cell_doy]
+
+    CELL_OFFSETS = {}
+    for i, e in enumerate(by_cell_tod):
+        cell = e[0]
+        if cell in CELL_OFFSETS:
+            CELL_OFFSETS[cell] = (CELL_OFFSETS[cell][0], i + 1)
+        else:
+            CELL_OFFSETS[cell] = (i, i + 1)
+
+
+# učitavanje podataka
+
+def _parquet_cache_path(path):
+    return os.path.splitext(path)[0] + ".parquet"
+
+#    engine: None - calamine sa povratkom na podrazumevani engine, inače tačno zadati engine (za benchmark)
+def _read_excel_columns(path, engine=None):
+    # calamine (Rust) je višestruko brži od openpyxl; ako nije instaliran, koristi se podrazumevani engine
+    # (pandas < 2.2 ne poznaje calamine i baca ValueError)
+    kwargs = dict(header=None, usecols=list(ACCIDENT_COLUMNS), dtype={3: str})
+    if engine is not None:
+        raw = pd.read_excel(path, engine=engine, **kwargs)
+    else:
+        try:
+            raw = pd.read_excel(path, engine='calamine', **kwargs)
+        except (ImportError, ValueError):
+            raw = pd.read_excel(path, **kwargs)
+    raw = raw.rename(columns=ACCIDENT_COLUMNS)
+
+    # Pojedine ćelije su tekst ('20.28') - numerička kolona je potrebna i za Parquet keš
+    for name in ('lon_raw', 'lat_raw'):
+        raw[name] = pd.to_numeric(raw[name], errors='coerce')
+    return raw
+
+def _read_raw_columns(path, use_cache=True):
+    # Jednokratna konverzija u Parquet - naredna učitavanja čitaju samo kolonski keš
+    cache_path = _parquet_cache_path(path)
+    if use_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception as e:
+            print(f"Parquet keš nije dostupan ({cache_path}): {e}")
+
+    raw = _read_excel_columns(path)
+
+    if use_cache:
+        try:
+            raw.to_parquet(cache_path, index=False)
+        except Exception as e:
+            print(f"Parquet keš nije upisan ({cache_path}): {e}")
+    return raw
+
+def _to_degrees(values: pd.Series) -> pd.Series:
+    # Skala se određuje za svaku vrednost: vrednosti koje nisu validni stepeni se pomeraju
+    # tako da ostanu dve cifre pre decimalne tačke (sve koordinate u Srbiji su između 10 i 100 stepeni)
+    values = pd.to_numeric(values, errors='coerce')
+    scaled = values.abs() > MAX_DEGREES
+    shift = np.floor(np.log10(values.abs().where(scaled))) - 1
+    return values.where(~scaled, values / 10 ** shift)
+
+def _validate_accidents_schema(raw: pd.DataFrame, path):
+    missing = [name for name in ACCIDENT_COLUMNS.values() if name not in raw.columns]
+    if missing:
+        raise ValueError(f"Neočekivana šema u {path}: nedostaju kolone {missing}")
+
+    datetime = pd.to_datetime(raw['datetime_str'], format=DATETIME_FORMAT, errors='coerce')
+    lon = _to_degrees(raw['lon_raw'])
+    lat = _to_degrees(raw['lat_raw'])
+
+    lat_min, lat_max, lon_min, lon_max = SERBIA_BOUNDS
+    bad_datetime = datetime.isna()
+    bad_coords = lat.isna() | lon.isna()
+    out_of_bounds = ~bad_coords & ~(lat.between(lat_min, lat_max) & lon.between(lon_min, lon_max))
+
+    # Fajl bez zaglavlja - ako prvi red ne prolazi parsiranje, verovatno je dodato zaglavlje
+    if len(raw) > 0 and bad_datetime.iloc[0]:
+        print(f"Upozorenje: prvi red u {path} nije validan zapis (zaglavlje?): {raw['datetime_str'].iloc[0]!r}")
+
+    report = {
+        'path': path,
+        'rows': len(raw),
+        'bad_datetime': raw.index[bad_datetime].tolist(),
+        'bad_coords': raw.index[bad_coords].tolist(),
+        'out_of_bounds': raw.index[out_of_bounds].tolist(),
+    }
 
-def load_accidents_data(path="data/nez-opendata-2024-20250125.xlsx", resolution: int = RESOLUTION):
+    df = pd.DataFrame({'datetime_str': raw['datetime_str'], 'datetime': datetime, 'lon': lon, 'lat': lat})
+    df = df[~(bad_datetime | bad_coords | out_of_bounds)]
+    report['valid'] = len(df)
+    return df, report
+
+def _print_schema_report(report):
+    print(f"Provera šeme za {report['path']}: {report['valid']}/{report['rows']} validnih redova")
+    for key, label in (('bad_datetime', 'neispravan datum'),
+                       ('bad_coords', 'neispravne koordinate'),
+                       ('out_of_bounds', 'koordinate van Srbije')):
+        rows = report[key]
+        if rows:
+            preview = ", ".join(str(r + 1) for r in rows[:10])
+            suffix = " ..." if len(rows) > 10 else ""
+            print(f"  - {label}: {len(rows)} redova (redovi: {preview}{suffix})")
+
+def read_accidents_file(path, use_cache=True):
+    raw = _read_raw_columns(path, use_cache=use_cache)
+    return _validate_accidents_schema(raw, path)
+
+def load_accidents_data(path="data/nez-opendata-2024-20250125.xlsx", resolution: int = RESOLUTION, use_cache=True):
     global ACCIDENTS_DF
     print("Učitavanje podataka o nesrećama iz", path)
-    df = pd.read_excel(path)
-
-    df = df.rename(columns={df.columns[3]: 'datetime_str'})
-    df['datetime'] = pd.to_datetime(df['datetime_str'], format='%d.%m.%Y,%H:%M', errors='coerce')
-    df = df.dropna(subset=['datetime'])
-
-    df['lon'] = df.iloc[:, 4].astype(float) / 1_000_000.0
-    df['lat'] = df.iloc[:, 5].astype(float) / 1_000_000.0
+    df, report = read_accidents_file(path, use_cache=use_cache)
+    _print_schema_report(report)
 
     ACCIDENTS_DF = df
 
@@ -126,43 +268,100 @@ def load_accidents_data(path="data/nez-opendata-2024-20250125.xlsx", resolution:
     print(f"  - Time-of-day index: {len(time_of_day_keys)} unosa")
     print(f"  - Day-of-year index: {len(day_of_year_keys)} unosa")
     print(f"  - H3 spatial cells: {len(ACCIDENTS_H3_MAP)} ćelija")
+    print(f"  - H3 x time index: {len(cell_time_of_day_keys)} unosa u {len(CELL_OFFSETS)} ćelija")
+
+def _max_rss_mb():
+    import platform
+    import resource
+
+    # Na Linux-u ru_maxrss nasleđuje maksimum roditeljskog procesa i posle exec-a - VmHWM se resetuje
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux vraća KB, MacOS bajtove
+    if platform.system() == 'Darwin':
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+def _bench_reader(reader, path):
+    # Pokreće se u zasebnom procesu (--bench-reader), da bi vršna memorija procesa (VmHWM na Linux-u,
+    # ru_maxrss na MacOS-u) merila samo jedan čitač i obuhvatila i memoriju calamine (Rust) i Arrow alokatora
+    import json
+
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    if reader == BENCH_READER_PARQUET:
+        raw = pd.read_parquet(_parquet_cache_path(path))
+    else:
+        raw = _read_excel_columns(path, engine=reader)
+    df, report = _validate_accidents_schema(raw, path)
+    elapsed = time.perf_counter() - start
+    rss_after = _max_rss_mb()
+
+    print(json.dumps({'seconds': elapsed, 'peak_rss_mb': rss_after, 'read_rss_mb': rss_after - rss_before,
+                      'rows': report['rows'], 'valid': report['valid']}))
+
+def benchmark_ingestion(paths=None, readers=BENCH_READERS):
+    # Meri vreme učitavanja i vršnu memoriju procesa (_max_rss_mb: VmHWM, odnosno ru_maxrss na MacOS-u)
+    # za svaki čitač i svaki fajl posebno.
+    # Parquet keš se pravi unapred, van merenja, tako da se upis ne meša sa čitanjem.
+    import json
+    import subprocess
+    import sys
 
-# vremenske funkcije
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for path in paths or DATA_FILES:
+        path = os.path.abspath(path)
+        if BENCH_READER_PARQUET in readers:
+            _read_raw_columns(path, use_cache=True)
+
+        for reader in readers:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--bench-reader', reader, path],
+                cwd=module_dir,
+                capture_output=True,
+                text=True
+            )
+            if proc.returncode != 0:
+                print(f"{os.path.basename(path)} [{reader}]: greška ({proc.stderr.strip().splitlines()[-1]})")
+                continue
+
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result.update({'path': path, 'reader': reader})
+            results.append(result)
+            print(f"{os.path.basename(path)} [{reader}]: {result['seconds']:.3f} s, "
+                  f"vršni RSS {result['peak_rss_mb']:.1f} MB (+{result['read_rss_mb']:.1f} MB za čitanje), "
+                  f"{result['valid']}/{result['rows']} validnih redova")
+    return results
 
-def _query_time_of_day_ids(current_ts: pd.Timestamp, window_seconds=3600):
-    if not time_of_day_keys:
-        return set()
+# vremenske funkcije
 
+def _time_of_day_ranges(current_ts: pd.Timestamp, window_seconds=3600):
     target = _seconds_since_midnight(current_ts)
     low = target - window_seconds
     high = target + window_seconds
-    matched_ids = set()
 
     if low >= 0 and high < SECONDS_IN_DAY:
-        l = bisect.bisect_left(time_of_day_keys, low)
-        r = bisect.bisect_right(time_of_day_keys, high)
-        matched_ids.update(time_of_day_ids[l:r])
-    else:
-        low_a = max(0, low)
-        high_a = SECONDS_IN_DAY - 1
-        if low_a <= high_a:
-            la = bisect.bisect_left(time_of_day_keys, low_a)
-            ra = bisect.bisect_right(time_of_day_keys, high_a)
-            matched_ids.update(time_of_day_ids[la:ra])
-
-        low_b = 0
-        high_b = min(SECONDS_IN_DAY - 1, high % SECONDS_IN_DAY)
-        if low_b <= high_b:
-            lb = bisect.bisect_left(time_of_day_keys, low_b)
-            rb = bisect.bisect_right(time_of_day_keys, high_b)
-            matched_ids.update(time_of_day_ids[lb:rb])
+        return [(low, high)]
 
-    return matched_ids
+    ranges = []
+    low_a = max(0, low)
+    high_a = SECONDS_IN_DAY - 1
+    if low_a <= high_a:
+        ranges.append((low_a, high_a))
 
-def _query_season_ids(current_ts: pd.Timestamp, window_days=30):
-    if not day_of_year_keys:
-        return set()
+    low_b = 0
+    high_b = min(SECONDS_IN_DAY - 1, high % SECONDS_IN_DAY)
+    if low_b <= high_b:
+        ranges.append((low_b, high_b))
+    return ranges
 
+def _season_ranges(current_ts: pd.Timestamp, window_days=30):
     window_seconds = window_days * SECONDS_IN_DAY
     target = _season_seconds(current_ts)
 
@@ -170,49 +369,75 @@ def _query_season_ids(current_ts: pd.Timestamp, window_days=30):
 
     low = target - window_seconds
     high = target + window_seconds
-    matched_ids = set()
 
     if low >= 0 and high < year_seconds:
-        l = bisect.bisect_left(day_of_year_keys, low)
-        r = bisect.bisect_right(day_of_year_keys, high)
-        matched_ids.update(day_of_year_ids[l:r])
-    else:
-        if low < 0:
-            low_a = year_seconds + low
-            high_a = year_seconds - 1
-            la = bisect.bisect_left(day_of_year_keys, low_a)
-            ra = bisect.bisect_right(day_of_year_keys, high_a)
-            matched_ids.update(day_of_year_ids[la:ra])
-
-            low_b = 0
-            high_b = high
-            lb = bisect.bisect_left(day_of_year_keys, low_b)
-            rb = bisect.bisect_right(day_of_year_keys, high_b)
-            matched_ids.update(day_of_year_ids[lb:rb])
-        elif high >= year_seconds:
-            low_a = low
-            high_a = year_seconds - 1
-            la = bisect.bisect_left(day_of_year_keys, low_a)
-            ra = bisect.bisect_right(day_of_year_keys, high_a)
-            matched_ids.update(day_of_year_ids[la:ra])
-
-            low_b = 0
-            high_b = high - year_seconds
-            lb = bisect.bisect_left(day_of_year_keys, low_b)
-            rb = bisect.bisect_right(day_of_year_keys, high_b)
-            matched_ids.update(day_of_year_ids[lb:rb])
+        return [(low, high)]
+    if low < 0:
+        return [(year_seconds + low, year_seconds - 1), (0, high)]
+    return [(low, year_seconds - 1), (0, high - year_seconds)]
+
+#    matched_ids: skup koji se dopunjava (za više ćelija se prosleđuje isti skup umesto spajanja novih)
+def _ids_in_ranges(keys, ids, ranges, lo=0, hi=None, matched_ids=None):
+    if hi is None:
+        hi = len(keys)
+    if matched_ids is None:
+        matched_ids = set()
+    for low, high in ranges:
+        l = bisect.bisect_left(keys, low, lo, hi)
+        r = bisect.bisect_right(keys, high, lo, hi)
+        if l < r:
+            matched_ids.update(ids[l:r])
+    return matched_ids
+
+def _query_time_of_day_ids(current_ts: pd.Timestamp, window_seconds=3600):
+    if not time_of_day_keys:
+        return set()
+    return _ids_in_ranges(time_of_day_keys, time_of_day_ids, _time_of_day_ranges(current_ts, window_seconds))
 
+def _query_season_ids(current_ts: pd.Timestamp, window_days=30):
+    if not day_of_year_keys:
+        return set()
+    return _ids_in_ranges(day_of_year_keys, day_of_year_ids, _season_ranges(current_ts, window_days))
+
+# prostorno-vremenske funkcije (kompozitni indeks)
+
+def _query_cells_ids(cells, keys, ids, ranges):
+    matched_ids = set()
+    for cell in cells:
+        span = CELL_OFFSETS.get(cell)
+        if span is None:
+            continue
+        _ids_in_ranges(keys, ids, ranges, span[0], span[1], matched_ids)
     return matched_ids
 
+def _query_cells_time_of_day_ids(cells, current_ts: pd.Timestamp, window_seconds=3600):
+    return _query_cells_ids(cells, cell_time_of_day_keys, cell_time_of_day_ids,
+                            _time_of_day_ranges(current_ts, window_seconds))
+
+def _query_cells_season_ids(cells, current_ts: pd.Timestamp, window_days=30):
+    return _query_cells_ids(cells, cell_day_of_year_keys, cell_day_of_year_ids,
+                            _season_ranges(current_ts, window_days))
+
 # prostorne funkcije
 
-def _collect_spatial_candidate_ids_center(lat, lon, look_ahead_km, resolution=RESOLUTION):
+def _center_cells(lat, lon, look_ahead_km, resolution=RESOLUTION):
+    ring = _cells_for_km(look_ahead_km)
+    center_cell = latlng_to_cell(lat, lon, resolution)
+    return grid_disk(center_cell, ring)
+
+def _route_cells(route_coords, resolution=RESOLUTION, buffer_ring=1):
+    route_cells = set()
+    for rlat, rlon in route_coords:
+        c = latlng_to_cell(rlat, rlon, resolution)
+        route_cells.update(grid_disk(c, buffer_ring))
+    return route_cells
+
+def _collect_spatial_candidate_ids_center(lat, lon, look_ahead_km, resolution=RESOLUTION, cells=None):
     if not ACCIDENTS_H3_MAP:
         return set()
 
-    ring = _cells_for_km(look_ahead_km)
-    center_cell = latlng_to_cell(lat, lon, resolution)
-    cells = grid_disk(center_cell, ring)
+    if cells is None:
+        cells = _center_cells(lat, lon, look_ahead_km, resolution)
 
     candidate_ids = set()
     for c in cells:
@@ -229,15 +454,13 @@ def _collect_spatial_candidate_ids_center(lat, lon, look_ahead_km, resolution=RE
             filtered.add(rid)
     return filtered
 
-def _collect_spatial_candidate_ids_along_route(route_coords, look_ahead_km, resolution=RESOLUTION, buffer_ring=1):
+def _collect_spatial_candidate_ids_along_route(route_coords, look_ahead_km, resolution=RESOLUTION, buffer_ring=1,
+                                               route_cells=None):
     if not ACCIDENTS_H3_MAP:
         return set()
 
-    ring = buffer_ring
-    route_cells = set()
-    for rlat, rlon in route_coords:
-        c = latlng_to_cell(rlat, rlon, resolution)
-        route_cells.update(grid_disk(c, ring))
+    if route_cells is None:
+        route_cells = _route_cells(route_coords, resolution, buffer_ring)
 
     candidate_ids = set()
     for cell in route_cells:
@@ -258,19 +481,27 @@ def _collect_spatial_candidate_ids_along_route(route_coords, look_ahead_km, reso
 
 # glavna check funkcija
 
-def check_accident_zone(lat, lon, current_time=None, future_route_coords=None, look_ahead_km=5.0, print_warning=True):
+#    temporal_index: 'cell' (kompozitni H3 x vreme indeks) ili 'global' (globalni sortirani nizovi)
+def check_accident_zone(lat, lon, current_time=None, future_route_coords=None, look_ahead_km=5.0, print_warning=True,
+                        temporal_index=TEMPORAL_INDEX_CELL):
     if current_time is None:
         current_time = pd.Timestamp.now()
 
     if future_route_coords and len(future_route_coords) > 0:
-        spatial_ids = _collect_spatial_candidate_ids_along_route(future_route_coords, look_ahead_km)
+        cells = _route_cells(future_route_coords)
+        spatial_ids = _collect_spatial_candidate_ids_along_route(future_route_coords, look_ahead_km, route_cells=cells)
     else:
-        spatial_ids = _collect_spatial_candidate_ids_center(lat, lon, look_ahead_km)
+        cells = _center_cells(lat, lon, look_ahead_km)
+        spatial_ids = _collect_spatial_candidate_ids_center(lat, lon, look_ahead_km, cells=cells)
 
     total_accidents = len(spatial_ids)
 
-    tod_ids = _query_time_of_day_ids(current_time, window_seconds=3600)
-    season_ids_set = _query_season_ids(current_time, window_days=30)
+    if temporal_index == TEMPORAL_INDEX_GLOBAL:
+        tod_ids = _query_time_of_day_ids(current_time, window_seconds=3600)
+        season_ids_set = _query_season_ids(current_time, window_days=30)
+    else:
+        tod_ids = _query_cells_time_of_day_ids(cells, current_time, window_seconds=3600)
+        season_ids_set = _query_cells_season_ids(cells, current_time, window_days=30)
 
     tod_spatial = spatial_ids.intersection(tod_ids)
     season_spatial = spatial_ids.intersection(season_ids_set)
@@ -329,10 +560,59 @@ def check_accident_zone(lat, lon, current_time=None, future_route_coords=None, l
         'details': accident_details
     }
 
+# Poredi vreme vremenskog dela upita (vreme dana + sezona) za kompozitni i globalni indeks.
+# Guste tačke su lokacije stvarnih nesreća, retke su nasumične tačke u granicama Srbije.
+def benchmark_temporal_index(dense_points=200, sparse_points=500, look_ahead_km=5.0, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    lat_min, lat_max, lon_min, lon_max = SERBIA_BOUNDS
+    records = list(ACCIDENTS_RECORDS.values())
+    point_sets = {
+        'guste': [(r['lat'], r['lon'], r['datetime']) for r in rng.sample(records, dense_points)],
+        'retke': [(rng.uniform(lat_min, lat_max), rng.uniform(lon_min, lon_max),
+                   records[rng.randrange(len(records))]['datetime']) for _ in range(sparse_points)],
+    }
+
+    results = {}
+    for label, points in point_sets.items():
+        queries = [(_center_cells(lat, lon, look_ahead_km), ts) for lat, lon, ts in points]
+
+        start = time.perf_counter()
+        for cells, ts in queries:
+            _query_cells_time_of_day_ids(cells, ts, window_seconds=3600)
+            _query_cells_season_ids(cells, ts, window_days=30)
+        cell_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for cells, ts in queries:
+            _query_time_of_day_ids(ts, window_seconds=3600)
+            _query_season_ids(ts, window_days=30)
+        global_seconds = time.perf_counter() - start
+
+        results[label] = {'queries': len(queries), 'cell_seconds': cell_seconds, 'global_seconds': global_seconds}
+        print(f"{label} tačke ({len(queries)} upita): cell {cell_seconds:.3f} s, global {global_seconds:.3f} s")
+    return results
+
+# Ista provera preko globalnih vremenskih nizova - za poređenje implementacija (drive_trace.py --compare)
+def check_accident_zone_global(*args, **kwargs):
+    return check_accident_zone(*args, temporal_index=TEMPORAL_INDEX_GLOBAL, **kwargs)
+
 # main
 
 if __name__ == "__main__":
     import sys
+    if "--bench-reader" in sys.argv:
+        i = sys.argv.index("--bench-reader")
+        _bench_reader(sys.argv[i + 1], sys.argv[i + 2])
+        sys.exit(0)
+    if "--bench" in sys.argv:
+        benchmark_ingestion()
+        sys.exit(0)
+    if "--bench-index" in sys.argv:
+        load_accidents_data()
+        benchmark_temporal_index()
+        sys.exit(0)
     try:
         load_accidents_data()
     except Exception as e: